@@ -0,0 +1,259 @@
+import argparse
+import os
+import sys
+from config import PipelineConfig
+from limits import RateLimiter, set_memory_limit
+from location_selection import LocationSelection
+import pipeline
+
+
+def _bbox(value):
+    try:
+        bbox = tuple(float(v) for v in value.split(","))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Bounding box must be numbers, got {value!r}")
+    if len(bbox) != 4:
+        raise argparse.ArgumentTypeError("Bounding box must be MIN_LAT,MIN_LON,MAX_LAT,MAX_LON")
+    min_lat, min_lon, max_lat, max_lon = bbox
+    if min_lat > max_lat or min_lon > max_lon:
+        raise argparse.ArgumentTypeError("Bounding box minimum must not exceed its maximum")
+    return bbox
+
+
+def _latency(value):
+    try:
+        latency = [float(v) for v in value.split(",")]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Latency must be seconds or MIN,MAX, got {value!r}")
+    if len(latency) == 1:
+        return latency[0]
+    if len(latency) != 2 or latency[0] > latency[1]:
+        raise argparse.ArgumentTypeError("Latency range must be MIN,MAX")
+    return tuple(latency)
+
+
+def _names(values):
+    # Accepts repeated --location flags as well as comma separated lists
+    if not values:
+        return None
+    return [name for value in values for name in value.split(",") if name]
+
+
+def build_parser():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--config", default=None,
+                        help="TOML config file (default: loadprofiles.toml if present, else built-in defaults)")
+    common.add_argument("--dry-run", action="store_true",
+                        help="Print the fetch/compute plan and cache hits without running it")
+
+    # Only for the subcommands that run locations and call the APIs
+    limits = argparse.ArgumentParser(add_help=False)
+    limits.add_argument("--workers", type=int, default=None, help="Locations processed in parallel")
+    limits.add_argument("--max-memory-mb", type=int, default=None,
+                        help="Address space limit for the process in MB (0 for no limit)")
+    limits.add_argument("--api-calls-per-minute", type=int, default=None,
+                        help="Limit on API calls per minute across all workers (0 for no limit)")
+
+    parser = argparse.ArgumentParser(prog="loadprofiles",
+                                     description="Generate load profiles in PERSEE format")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def add_selection(p):
+        p.add_argument("--locations-file", default=None, help="Location csv (loc,lat,lon[,zone])")
+        p.add_argument("--location", action="append", default=None, metavar="NAME",
+                       help="Location name, may be repeated or comma separated")
+        p.add_argument("--bbox", type=_bbox, default=None, metavar="MIN_LAT,MIN_LON,MAX_LAT,MAX_LON",
+                       help="Only keep locations inside this bounding box")
+
+    p_build = sub.add_parser("build", parents=[common, limits],
+                             help="Fetch data and write a PERSEE dataseries per location")
+    add_selection(p_build)
+    p_build.add_argument("--refresh", action="store_true", help="Ignore cached API files and download again")
+    p_build.add_argument("--averages", default=None,
+                         help="Location averages csv, rows of the built locations are replaced or added")
+
+    p_fetch = sub.add_parser("fetch", parents=[common, limits],
+                             help="Only download renewables ninja and electricity maps data")
+    add_selection(p_fetch)
+    p_fetch.add_argument("--refresh", action="store_true", help="Ignore cached API files and download again")
+
+    p_replay = sub.add_parser("replay", parents=[common, limits],
+                              help="Fetch against local stub servers serving the recorded files")
+    add_selection(p_replay)
+    p_replay.add_argument("--latency", type=_latency, default=None, metavar="S or MIN,MAX",
+                          help="Seconds added to every stub response")
+    p_replay.add_argument("--rate-limit", type=int, default=None,
+                          help="Requests per --rate-period before the stub answers 429")
+    p_replay.add_argument("--rate-period", type=float, default=None)
+    p_replay.add_argument("--gap-rate", type=float, default=None, help="Probability of a 404 response")
+    p_replay.add_argument("--gap", action="append", default=None, metavar="NAME",
+                          help="Location name or zone that always answers 404")
+    p_replay.add_argument("--seed", type=int, default=None)
+    p_replay.add_argument("--passes", type=int, default=None,
+                          help="Passes over the locations, the first one starts with an empty cache")
+
+    p_sweep = sub.add_parser("sweep", parents=[common],
+                             help="Write sensitivity analysis tables from legacy PLAN results")
+    p_sweep.add_argument("--location", action="append", default=None, metavar="NAME",
+                         help="Location name, may be repeated or comma separated")
+    p_sweep.add_argument("--duration", action="append", default=None, help="Duration label, e.g. 01Y")
+    p_sweep.add_argument("--legacy-folder", default=None)
+    p_sweep.add_argument("--output-folder", default=None)
+    return parser
+
+
+def _limits(cfg, args):
+    limits = dict(cfg.limits)
+    for key in ("workers", "max_memory_mb", "api_calls_per_minute"):
+        value = getattr(args, key)
+        if value is not None:
+            limits[key] = value
+    if limits["workers"] < 1:
+        raise SystemExit("--workers must be at least 1")
+    if limits["max_memory_mb"] < 0:
+        raise SystemExit("--max-memory-mb must not be negative (0 for no limit)")
+    if limits["api_calls_per_minute"] < 0:
+        raise SystemExit("--api-calls-per-minute must not be negative (0 for no limit)")
+    return limits
+
+
+def _select(cfg, args):
+    filename = args.locations_file or cfg.inputs["locations"]
+    loc_sel = LocationSelection(filename)
+    if loc_sel.locations is None:
+        raise SystemExit(f"Could not read locations from {filename}")
+    try:
+        locations = loc_sel.select(names=_names(args.location), bbox=args.bbox)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    if not locations:
+        raise SystemExit("No locations match the selection")
+    return locations
+
+
+def _run_sweep(cfg, args):
+    from sensitivity_analysis_file import run_sweep
+    sweep = cfg.sweep
+    legacy_folder = args.legacy_folder or sweep["legacy_folder"]
+    output_folder = args.output_folder or sweep["output_folder"]
+    locations = _names(args.location) or sweep["location_names"]
+    durations = _names(args.duration) or sweep["duration"]
+    if args.dry_run:
+        missing = 0
+        for year in durations:
+            for location in locations:
+                src_path = os.path.join(legacy_folder, f"0_{year}_{location}_W_NA_results_PLAN.csv")
+                found = os.path.exists(src_path)
+                missing += not found
+                print(f"  read {'found' if found else 'MISSING':<8} {src_path}")
+        print(f"{len(durations) * len(locations)} plan file(s), {missing} missing, output to {output_folder}")
+        return 0
+    run_sweep(legacy_folder, output_folder, locations, durations)
+    return 0
+
+
+def _check_replay(opts):
+    # Same checks as StubServer, reported as messages for both flags and [replay] values
+    latency = opts["latency"]
+    if isinstance(latency, (list, tuple)):
+        if len(latency) != 2 or not 0 <= latency[0] <= latency[1]:
+            raise SystemExit("--latency range must be MIN,MAX with 0 <= MIN <= MAX")
+        opts["latency"] = tuple(latency)
+    elif latency < 0:
+        raise SystemExit("--latency must not be negative")
+    if opts["rate_limit"] < 0:
+        raise SystemExit("--rate-limit must not be negative (0 for no limit)")
+    if opts["rate_period"] <= 0:
+        raise SystemExit("--rate-period must be greater than 0")
+    if not 0 <= opts["gap_rate"] <= 1:
+        raise SystemExit("--gap-rate must be between 0 and 1")
+    if opts["passes"] < 1:
+        raise SystemExit("--passes must be at least 1")
+    return opts
+
+
+def _run_replay(cfg, args, locations, limits):
+    import replay
+    opts = dict(cfg.replay)
+    for key in ("latency", "rate_limit", "rate_period", "gap_rate", "seed", "passes"):
+        value = getattr(args, key)
+        if value is not None:
+            opts[key] = value
+    if args.gap is not None:
+        opts["gaps"] = _names(args.gap)
+    _check_replay(opts)
+    if args.dry_run:
+        gaps = set(opts["gaps"])
+        year = cfg.inputs["price_year"]
+        for location in locations:
+            loc, zone = location[0], location[3]
+            print(loc)
+            for s in pipeline.plan_location(cfg, location):
+                path, gap, recorded = s["path"], loc in gaps, s["cached"]
+                if s["step"].startswith("fetch prices"):
+                    # Prices are served by zone, possibly from another location's file
+                    served_loc, path = replay.StubServer.find_prices(locations, zone, year,
+                                                                     cfg.outputs["elec_prices_dir"])
+                    gap, recorded = served_loc in gaps or zone in gaps, path is not None
+                    path = path or s["path"]
+                if gap:
+                    status = "gap (404)"
+                elif recorded:
+                    status = "recorded"
+                else:
+                    status = "missing (404)"
+                print(f"  {s['step']:<24} {status:<24} {path}")
+        print(f"Stub: latency {opts['latency']} s, {opts['rate_limit'] or 'unlimited'} requests "
+              f"per {opts['rate_period']} s, gap rate {opts['gap_rate']}, gaps {opts['gaps'] or 'none'}")
+        return 0
+
+    set_memory_limit(limits["max_memory_mb"])
+    server = replay.StubServer(locations, cfg.outputs["re_ninja_dir"], cfg.outputs["elec_prices_dir"],
+                               latency=opts["latency"], rate_limit=opts["rate_limit"],
+                               rate_period=opts["rate_period"], gap_rate=opts["gap_rate"],
+                               gaps=opts["gaps"], seed=opts["seed"])
+    with server:
+        print(f"Stub servers listening on {server.url}")
+        reports = replay.replay_fetch(cfg, locations, server, limits["workers"], opts["passes"],
+                                      limits["api_calls_per_minute"])
+    replay.print_report(reports)
+    return 0
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        cfg = PipelineConfig(args.config)
+    except (OSError, ValueError) as e:
+        raise SystemExit(str(e))
+    if args.command == "sweep":
+        return _run_sweep(cfg, args)
+
+    limits = _limits(cfg, args)
+
+    locations = _select(cfg, args)
+    if args.command == "replay":
+        return _run_replay(cfg, args, locations, limits)
+
+    use_cache = not args.refresh
+    if args.dry_run:
+        plan = pipeline.plan_build if args.command == "build" else pipeline.plan_location
+        pipeline.print_plan([(location[0], plan(cfg, location, use_cache)) for location in locations])
+        max_memory = f"{limits['max_memory_mb']} MB" if limits["max_memory_mb"] else "unlimited"
+        print(f"Limits: {limits['workers']} worker(s), max memory {max_memory}, "
+              f"{limits['api_calls_per_minute'] or 'unlimited'} API calls/min")
+        return 0
+
+    set_memory_limit(limits["max_memory_mb"])
+    rate_limiter = RateLimiter(limits["api_calls_per_minute"])
+    if args.command == "fetch":
+        pipeline.run_fetch(cfg, locations, limits["workers"], rate_limiter, use_cache)
+    else:
+        pipeline.run_build(cfg, locations, limits["workers"], rate_limiter, use_cache,
+                           averages_path=args.averages)
+    print(f"API calls made: {rate_limiter.calls_made}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+import copy
+import os
+import tomllib
+
+DEFAULT_CONFIG = "loadprofiles.toml"
+
+DEFAULTS = {
+    "time": {
+        "start_date": "2025-01-01 00:00",
+        "sec_interval": 3600,
+        "steps_per_day": 24,
+        "nb_steps": 8760,
+    },
+    "inputs": {
+        "profiles": "profili.xlsx",
+        "loads": "Loads.csv",
+        "locations": "locations/location_selection_global_atlas.csv",
+        "rand_range": [0.9, 1.1],
+        "price_year": 2019,
+    },
+    "outputs": {
+        "re_ninja_dir": "re_ninja",
+        "elec_prices_dir": "electricity_prices",
+        "dataseries_dir": "dataseries",
+        "averages": "locations/location_averages.csv",
+    },
+    "api": {
+        "ninja_base": "https://www.renewables.ninja/api/",
+        "elec_base": "https://api.electricitymaps.com/",
+        "ninja_sleep_s": 1.0,
+        "elec_sleep_s": 0.3,
+        "max_retries": 3,
+    },
+    "merge": {
+        "Elec_Central": {
+            "columns_idx": list(range(1, 10)),
+            "load_type": "load",
+            "units": "MW"
+        }
+    },
+    "limits": {
+        "workers": 1,
+        "max_memory_mb": 0,
+        "api_calls_per_minute": 0,
+    },
+    "sweep": {
+        "legacy_folder": "legacy_files",
+        "output_folder": "tab_ech",
+        "location_names": ["HS", "HW", "HWS", "LWS", "MWS"],
+        "duration": ["01Y", "10Y"],
+    },
+    "replay": {
+        "latency": 0.0,
+        "rate_limit": 0,
+        "rate_period": 1.0,
+        "gap_rate": 0.0,
+        "gaps": [],
+        "seed": 0,
+        "passes": 2,
+    },
+}
+
+
+# Keys that also accept a type other than their default's
+EXTRA_TYPES = {
+    ("replay", "latency"): list,  # [min, max] range
+}
+
+
+def _check_type(section, key, value, filename):
+    # Values must have the type of their default, an int is accepted where a float is expected
+    default = DEFAULTS[section][key]
+    extra = EXTRA_TYPES.get((section, key))
+    if extra is not None and isinstance(value, extra):
+        return
+    if isinstance(default, float):
+        ok = isinstance(value, (int, float)) and not isinstance(value, bool)
+    elif isinstance(default, int) and not isinstance(default, bool):
+        ok = isinstance(value, int) and not isinstance(value, bool)
+    else:
+        ok = isinstance(value, type(default))
+    if not ok:
+        raise ValueError(f"[{section}] {key} in {filename} must be {type(default).__name__}, "
+                         f"got {type(value).__name__} {value!r}")
+
+
+class PipelineConfig:
+    def __init__(self, filename: str | None = None):
+        """
+        Load pipeline settings from a TOML file on top of the built-in defaults.
+        Every section except [merge] is updated key by key, so a config file only needs the values it changes.
+        Unknown sections and keys, and values of another type than the default, raise ValueError
+        so a typo is not silently ignored.
+        A [merge] section replaces the default merge map entirely.
+        If no filename is given, loadprofiles.toml is used when present.
+        """
+        if filename is None and os.path.exists(DEFAULT_CONFIG):
+            filename = DEFAULT_CONFIG
+        self.filename = filename
+        self.data = copy.deepcopy(DEFAULTS)
+        if filename is not None:
+            with open(filename, "rb") as f:
+                user = tomllib.load(f)
+            for section, values in user.items():
+                if section not in self.data:
+                    raise ValueError(f"Unknown config section [{section}] in {filename}")
+                if not isinstance(values, dict):
+                    raise ValueError(f"[{section}] in {filename} must be a table")
+                if section == "merge":
+                    self.data[section] = values
+                    continue
+                unknown = set(values) - set(DEFAULTS[section])
+                if unknown:
+                    raise ValueError(f"Unknown key(s) in [{section}] of {filename}: {', '.join(sorted(unknown))}")
+                for key, value in values.items():
+                    _check_type(section, key, value, filename)
+                self.data[section].update(values)
+
+        self.time = self.data["time"]
+        self.inputs = self.data["inputs"]
+        self.outputs = self.data["outputs"]
+        self.api = self.data["api"]
+        self.merge_map = self.data["merge"]
+        self.limits = self.data["limits"]
+        self.sweep = self.data["sweep"]
+        self.replay = self.data["replay"]
@@ -4,6 +4,7 @@ import requests
 from dotenv import load_dotenv
 import os
 import pandas as pd
+from limits import get_with_retry
 
 
 load_dotenv()
@@ -15,18 +16,34 @@ class ElectricityMaps:
                  location_name: str,
                  token: str = os.getenv("API_TOKEN_ELEC"),
                  api_base: str = 'https://api.electricitymaps.com/',
-                 sleep_s: float = 0.3
+                 sleep_s: float = 0.3,
+                 out_dir: str = "electricity_prices",
+                 rate_limiter=None,
+                 max_retries: int = 3
                  ):
         self.api_base = api_base
         self.location_name = location_name
         self.sleep_s = sleep_s
+        self.out_dir = out_dir
+        self.rate_limiter = rate_limiter
+        self.max_retries = max_retries
         self.s = requests.session()
-        self.s.headers = {"auth-token": token}
+        # Token is only needed once a file is not cached
+        self.s.headers = {"auth-token": token} if token else {}
+
+    @staticmethod
+    def cache_path(location_name: str, sel_year: int = 2019, out_dir: str = "electricity_prices"):
+        return os.path.join(out_dir, f"elec_price_{sel_year}_{location_name}.csv")
+
+    @staticmethod
+    def nb_requests(sel_year: int = 2019, step_days: int = 10):
+        # Number of past-range calls needed to cover a full year
+        days = (datetime(sel_year + 1, 1, 1) - datetime(sel_year, 1, 1)).days
+        return -(-days // step_days)
 
     def fetch_electricity_prices(self, zone, sel_year: int = 2019, use_cache: bool = True):
-        out_dir = "electricity_prices"
-        os.makedirs(out_dir, exist_ok=True)
-        out_path = os.path.join(out_dir, f"elec_price_{sel_year}_{self.location_name}.csv")
+        os.makedirs(self.out_dir, exist_ok=True)
+        out_path = self.cache_path(self.location_name, sel_year, self.out_dir)
 
         if use_cache and os.path.exists(out_path):
             print(f"[ElectricityMaps] Using cached file: {out_path}")
@@ -50,7 +67,7 @@ class ElectricityMaps:
                 'temporalGranularity': 'hourly'
             }
 
-            r = self.s.get(url, params=args)
+            r = get_with_retry(self.s, url, args, self.rate_limiter, self.max_retries)
             if r.status_code == 404:
                 return None
             r.raise_for_status()
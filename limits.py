@@ -0,0 +1,87 @@
+import threading
+import time
+from collections import deque
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+
+class RateLimiter:
+    def __init__(self, calls_per_minute: int = 0, period: float = 60.0):
+        """
+        Sliding window limiter shared by the API clients and worker threads.
+        A calls_per_minute of 0 disables the limit.
+        """
+        if calls_per_minute < 0:
+            raise ValueError("calls_per_minute must not be negative")
+        self.calls_per_minute = calls_per_minute
+        self.period = period
+        self.calls_made = 0
+        self.retries = 0
+        self._calls = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until another API call is allowed within the current window."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if not self.calls_per_minute:
+                    self.calls_made += 1
+                    return
+                while self._calls and now - self._calls[0] >= self.period:
+                    self._calls.popleft()
+                if len(self._calls) < self.calls_per_minute:
+                    self._calls.append(now)
+                    self.calls_made += 1
+                    return
+                wait = self.period - (now - self._calls[0])
+            time.sleep(wait)
+
+    def record_retry(self):
+        with self._lock:
+            self.retries += 1
+
+
+def set_memory_limit(max_memory_mb: int):
+    """
+    Cap the address space of this process so a run on a shared node fails with MemoryError
+    instead of pushing the node into swap. A value of 0 leaves the limit unchanged.
+    """
+    if max_memory_mb < 0:
+        raise ValueError("max_memory_mb must not be negative")
+    if not max_memory_mb:
+        return False
+    if resource is None:
+        print("Memory limit is not supported on this platform; ignoring --max-memory-mb")
+        return False
+    limit = int(max_memory_mb) * 1024 * 1024
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    return True
+
+
+def get_with_retry(session, url, params, rate_limiter=None, max_retries: int = 3, backoff_s: float = 1.0):
+    """
+    GET url, waiting and retrying when the API answers 429 (Too Many Requests).
+    The wait is the Retry-After header when present, otherwise an exponential backoff.
+    The last response is returned once max_retries is reached so the caller can raise_for_status.
+    """
+    for attempt in range(max_retries + 1):
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        r = session.get(url, params=params)
+        if r.status_code != 429 or attempt == max_retries:
+            return r
+        retry_after = r.headers.get("Retry-After")
+        try:
+            wait = float(retry_after)
+        except (TypeError, ValueError):
+            wait = backoff_s * 2 ** attempt
+        if rate_limiter is not None:
+            rate_limiter.record_retry()
+        time.sleep(wait)
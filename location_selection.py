@@ -11,8 +11,35 @@ class LocationSelection:
     def _locations_list(self):
         try:
             df = pd.read_csv(self.filename, sep=self.sep)
-            locations = list(df.itertuples(index=False, name=None))
+            # Rows are (loc, lat, lon, zone); zone is None when the file has no electricity maps zone column
+            locations = [row[:4] + (None,) * (4 - len(row[:4]))
+                         for row in df.itertuples(index=False, name=None)]
             return locations
         except Exception as e:
             print(f"Error loading location csv: {e}")
-            return None
\ No newline at end of file
+            return None
+
+    def select(self, names=None, bbox=None):
+        """
+        Filter the locations by name and/or bounding box.
+        names: iterable of location names, None keeps all names.
+        bbox: (min_lat, min_lon, max_lat, max_lon), None keeps all coordinates.
+        Returns the matching locations in file order.
+        """
+        if self.locations is None:
+            return []
+        if names is not None:
+            names = set(names)
+            unknown = names - {loc for loc, _, _, _ in self.locations}
+            if unknown:
+                raise ValueError(f"Unknown location(s) in {self.filename}: {', '.join(sorted(unknown))}")
+        selected = []
+        for loc, lat, lon, zone in self.locations:
+            if names is not None and loc not in names:
+                continue
+            if bbox is not None:
+                min_lat, min_lon, max_lat, max_lon = bbox
+                if not (min_lat <= lat <= max_lat and min_lon <= lon <= max_lon):
+                    continue
+            selected.append((loc, lat, lon, zone))
+        return selected
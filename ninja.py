@@ -2,6 +2,7 @@ import requests
 import time
 from dotenv import load_dotenv
 import os
+from limits import get_with_retry
 
 load_dotenv()
 api_token = os.getenv("API_TOKEN")
@@ -12,17 +13,37 @@ class RenewableNinja:
                  location_name: str,
                  token: str = os.getenv("API_TOKEN"),
                  api_base: str = 'https://www.renewables.ninja/api/',
-                 format_type: str = 'csv'
+                 format_type: str = 'csv',
+                 out_dir: str = "re_ninja",
+                 rate_limiter=None,
+                 sleep_s: float = 1.0,
+                 max_retries: int = 3
                  ):
         self.api_base = api_base
         self.location_name = location_name
         self.format_type = format_type
+        self.out_dir = out_dir
+        self.rate_limiter = rate_limiter
+        self.sleep_s = sleep_s
+        self.max_retries = max_retries
         self.s = requests.Session()
-        self.s.headers = {'Authorization': 'Token ' + token}
+        # Token is only needed once a file is not cached
+        self.s.headers = {'Authorization': 'Token ' + token} if token else {}
 
     def _calc_date_range(self, start_date: str, duration: int):
         pass
 
+    @staticmethod
+    def cache_path(location_name: str, re_type: str, format_type: str = 'csv', out_dir: str = "re_ninja"):
+        fname = f"ninja_{re_type}_{location_name}.{format_type}"
+        return os.path.join(out_dir, fname)
+
+    def _get(self, url, args):
+        response = get_with_retry(self.s, url, args, self.rate_limiter, self.max_retries)
+        response.raise_for_status()
+        time.sleep(self.sleep_s)
+        return response
+
     def get_re_data(self, coords: tuple[float, float], re_type: str, use_cache: bool = True):
         lat = coords[0]
         lon = coords[1]
@@ -88,18 +109,14 @@ class RenewableNinja:
         url = self.api_base + ext
 
         if self.format_type == 'csv':
-            fname = f"ninja_{re_type}_{self.location_name}.{self.format_type}"
-            out_dir = "re_ninja"
-            os.makedirs(out_dir, exist_ok=True)
-            out_path = os.path.join(out_dir, fname)
+            os.makedirs(self.out_dir, exist_ok=True)
+            out_path = self.cache_path(self.location_name, re_type, self.format_type, self.out_dir)
 
             if use_cache and os.path.exists(out_path):
                 print(f"[Renewables Ninja] Using cached file: {out_path}")
                 return out_path
 
-            response = self.s.get(url, params=args)
-            response.raise_for_status()
-            time.sleep(1.0)
+            response = self._get(url, args)
 
             with open(out_path, 'w') as f:
                 f.write(response.text)
@@ -107,8 +124,6 @@ class RenewableNinja:
             return out_path
 
         elif self.format_type == 'json':
-            response = self.s.get(url, params=args)
-            response.raise_for_status()
-            time.sleep(1.0)
+            response = self._get(url, args)
             data = response.json()
             print(data)
@@ -0,0 +1,228 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from persee_format import PerseeFormat
+from ninja import RenewableNinja
+from temperatures import Temperatures
+from electricitymaps_api import ElectricityMaps
+
+RE_TYPES = ["pv", "wind", "demand", "weather"]
+
+
+def _has_zone(zone):
+    return zone is not None and not pd.isna(zone)
+
+
+def plan_location(cfg, location, use_cache=True):
+    """
+    List the fetch and compute steps needed to build one location without calling any API.
+    Each step is a dict with keys: step, path, cached, api_calls.
+    """
+    loc, lat, lon, zone = location
+    steps = []
+    for re_type in RE_TYPES:
+        path = RenewableNinja.cache_path(loc, re_type, out_dir=cfg.outputs["re_ninja_dir"])
+        cached = use_cache and os.path.exists(path)
+        steps.append({"step": f"fetch ninja {re_type}", "path": path, "cached": cached,
+                      "api_calls": 0 if cached else 1})
+    if _has_zone(zone):
+        year = cfg.inputs["price_year"]
+        path = ElectricityMaps.cache_path(loc, year, cfg.outputs["elec_prices_dir"])
+        cached = use_cache and os.path.exists(path)
+        steps.append({"step": f"fetch prices {zone}", "path": path, "cached": cached,
+                      "api_calls": 0 if cached else ElectricityMaps.nb_requests(year)})
+    return steps
+
+
+def plan_build(cfg, location, use_cache=True):
+    loc = location[0]
+    steps = plan_location(cfg, location, use_cache)
+    steps.append({"step": "compute COP", "path": os.path.join(cfg.outputs["re_ninja_dir"], f"COP_{loc}.csv"),
+                  "cached": False, "api_calls": 0})
+    steps.append({"step": "write dataseries",
+                  "path": os.path.join(cfg.outputs["dataseries_dir"], f"INDY_{loc}_dataseries.csv"),
+                  "cached": False, "api_calls": 0})
+    return steps
+
+
+def print_plan(plans):
+    """Print the plan returned by plan_location/plan_build for each location and return the API call total."""
+    total_calls = 0
+    hits = 0
+    nb_fetch = 0
+    for loc, steps in plans:
+        print(loc)
+        for s in steps:
+            if s["step"].startswith("fetch"):
+                nb_fetch += 1
+                hits += s["cached"]
+                status = "cache hit" if s["cached"] else f"fetch ({s['api_calls']} API calls)"
+            else:
+                status = "compute"
+            print(f"  {s['step']:<24} {status:<24} {s['path']}")
+            total_calls += s["api_calls"]
+    print(f"{len(plans)} location(s), {hits}/{nb_fetch} cache hits, {total_calls} API calls")
+    return total_calls
+
+
+def fetch_location(cfg, location, rate_limiter=None, use_cache=True):
+    """Download (or reuse cached) renewables ninja and electricity maps files for one location."""
+    loc, lat, lon, zone = location
+    ninja = RenewableNinja(location_name=loc, api_base=cfg.api["ninja_base"], out_dir=cfg.outputs["re_ninja_dir"],
+                           rate_limiter=rate_limiter, sleep_s=cfg.api["ninja_sleep_s"],
+                           max_retries=cfg.api["max_retries"])
+    files = {re_type: ninja.get_re_data((lat, lon), re_type=re_type, use_cache=use_cache)
+             for re_type in RE_TYPES}
+    files["prices"] = None
+    if _has_zone(zone):
+        elec = ElectricityMaps(location_name=loc, api_base=cfg.api["elec_base"], sleep_s=cfg.api["elec_sleep_s"],
+                               out_dir=cfg.outputs["elec_prices_dir"], rate_limiter=rate_limiter,
+                               max_retries=cfg.api["max_retries"])
+        files["prices"] = elec.fetch_electricity_prices(zone=zone, sel_year=cfg.inputs["price_year"],
+                                                        use_cache=use_cache)
+    return files
+
+
+def build_base_loads(cfg, persee):
+    """Generic load profiles shared by every location."""
+    nb_steps = cfg.time["nb_steps"]
+    sec_interval = cfg.time["sec_interval"]
+    base_df = pd.DataFrame({"Time": [int((i + 1) * sec_interval) for i in range(nb_steps)]})
+    base_load_dict = {}
+    # Download generic load profiles
+    profile_df = pd.read_excel(cfg.inputs["profiles"])
+    # Add load profiles from excel file
+    base_df, base_load_dict = persee.generate_loads(cfg.inputs["loads"], base_df, base_load_dict, nb_steps,
+                                                    cfg.time["steps_per_day"], profile_df,
+                                                    rand_range=tuple(cfg.inputs["rand_range"]))
+    # Run merge loads function  (optional)
+    if cfg.merge_map:
+        base_df, base_load_dict = persee.merge_loads(base_df, base_load_dict, cfg.merge_map,
+                                                     drop_originals=False)
+    return base_df, base_load_dict
+
+
+def build_location(cfg, persee, base_df, base_load_dict, location, rate_limiter=None, use_cache=True):
+    """Build and save the PERSEE dataseries for one location and return its averages."""
+    loc, lat, lon, zone = location
+    files = fetch_location(cfg, location, rate_limiter, use_cache)
+    pv_file = files["pv"]
+    wind_file = files["wind"]
+    demand_file = files["demand"]
+    temp_file = files["weather"]
+    temps = Temperatures(temp_file, loc=loc, coords=(lat, lon))
+    cop_file = temps.cop_series_to_csv(folder=cfg.outputs["re_ninja_dir"])
+    elec_price_file = files["prices"]
+
+    # Use same electricity data for all locations
+    df = base_df.copy(deep=True)
+    load_dict = base_load_dict.copy()
+
+    # Add data from renewables ninja
+    df, load_dict = persee.load_renewables(pv_file, ["PV"], [1],
+                                           df, load_dict, 1000000, load_type="Generation")
+    # Solar Thermal estimated at 707 W/m2 at 20C vs. 250 W/m2 for PV which is 2.8 times more
+    df, load_dict = persee.load_renewables(pv_file, ["Solar_Thermal"], [1],
+                                           df, load_dict, 353606, load_type="Generation")
+    df, load_dict = persee.load_renewables(wind_file, ["Wind"], [1],
+                                           df, load_dict, 1000, load_type="Generation")
+    df, load_dict = persee.load_renewables(demand_file, ["Heating_Central", "Cooling_Central"], [2, 3],
+                                           df, load_dict, 1000)
+    df, load_dict = persee.load_renewables(temp_file, ["Temperature"], [1], df, load_dict,
+                                           divider=1, load_type="temp", units="degC")
+    df, load_dict = persee.load_renewables(cop_file, ["COP"], [0], dataframe=df, load_dictionary=load_dict,
+                                           divider=1, skiprows=0, load_type="COP", units="-")
+    # Add data from electricity maps app
+    if elec_price_file is not None:
+        df, load_dict = persee.load_elec_prices(elec_price_file, df, load_dict)
+    elif _has_zone(zone):
+        print(f"No price coverage for zone {zone}; skipping electricity prices timeseries")
+    else:
+        print(f"No electricity maps zone for {loc}; skipping electricity prices timeseries")
+
+    elec_avg = df["Elec_Central"].mean() if "Elec_Central" in df.columns else float("nan")
+    heating_avg = df.loc[df['Heating_Central'] > 0, "Heating_Central"].mean()
+    cooling_avg = df.loc[df['Cooling_Central'] > 0, "Cooling_Central"].mean()
+    price_avg = df["GridPrice"].mean() if "GridPrice" in df.columns else float("nan")
+    # Single print so summaries from parallel workers do not interleave
+    print("\n".join([
+        loc,
+        f"Average Temperature: {temps.t_avg}",
+        f"Summer Average Temperature: {temps.summer_avg}",
+        f"Winter Average Temperature: {temps.winter_avg}",
+        f"COP Average Temperature: {temps.cop_avg}",
+        f"Electricity Average (MW): {elec_avg}",
+        f"Heating Average (MW): {heating_avg}",
+        f"Cooling Average (MW): {cooling_avg}",
+        f"Electricity Prices Average (EUR/MWh): {price_avg}",
+    ]))
+
+    # Add PERSEE required descriptive headers
+    df = persee.add_headers(df, load_dict, cfg.time["start_date"])
+
+    # Save final DataFrame to CSV
+    out_dir = cfg.outputs["dataseries_dir"]
+    os.makedirs(out_dir, exist_ok=True)
+    out_path = os.path.join(out_dir, f"INDY_{loc}_dataseries.csv")
+    df.to_csv(out_path, sep=";", index=False, header=False, float_format='%3g')
+    print(f"Saved dataseries to {out_path}")
+
+    return {
+        "loc": loc,
+        "lat": lat,
+        "lon": lon,
+        "avg_temp": temps.t_avg,
+        "avg_summer": temps.summer_avg,
+        "avg_winter": temps.winter_avg,
+        "avg_cop": temps.cop_avg,
+        "elec_avg": elec_avg,
+        "heating_avg": heating_avg,
+        "cooling_avg": cooling_avg,
+        "elec_price_avg": price_avg
+    }
+
+
+def run_fetch(cfg, locations, workers=1, rate_limiter=None, use_cache=True):
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        return list(pool.map(lambda location: fetch_location(cfg, location, rate_limiter, use_cache),
+                             locations))
+
+
+def run_build(cfg, locations, workers=1, rate_limiter=None, use_cache=True, averages_path=None):
+    """
+    Build the dataseries of every location, running up to `workers` locations at once,
+    then update the location averages csv with their rows (see update_averages).
+    """
+    persee = PerseeFormat()
+    base_df, base_load_dict = build_base_loads(cfg, persee)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        loc_results = list(pool.map(
+            lambda location: build_location(cfg, persee, base_df, base_load_dict, location,
+                                            rate_limiter, use_cache),
+            locations))
+
+    if averages_path is None:
+        averages_path = cfg.outputs["averages"]
+    if averages_path:
+        update_averages(averages_path, loc_results)
+        print(f"Saved location average values to {averages_path}")
+    return loc_results
+
+
+def update_averages(averages_path, loc_results):
+    """
+    Write the averages of the built locations to averages_path without losing the other locations:
+    rows of an existing file are replaced in place by loc, new locations are appended.
+    """
+    new = pd.DataFrame(loc_results)
+    if os.path.exists(averages_path):
+        old = pd.read_csv(averages_path)
+        rows = []
+        for _, row in old.iterrows():
+            match = new[new["loc"] == row["loc"]]
+            rows.append(match.iloc[0].to_dict() if len(match) else row.to_dict())
+        built = set(old["loc"])
+        rows.extend(r for r in loc_results if r["loc"] not in built)
+        new = pd.DataFrame(rows, columns=list(dict.fromkeys(list(old.columns) + list(new.columns))))
+    new.to_csv(averages_path, index=False)
+    return new
@@ -0,0 +1,272 @@
+import copy
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+import pandas as pd
+from ninja import RenewableNinja
+from electricitymaps_api import ElectricityMaps
+from limits import RateLimiter
+import pipeline
+
+
+class StubServer:
+    def __init__(self, locations,
+                 re_ninja_dir: str = "re_ninja",
+                 elec_prices_dir: str = "electricity_prices",
+                 latency=0.0,
+                 rate_limit: int = 0,
+                 rate_period: float = 1.0,
+                 gap_rate: float = 0.0,
+                 gaps=(),
+                 seed: int = 0,
+                 host: str = "127.0.0.1",
+                 port: int = 0
+                 ):
+        """
+        Local HTTP server answering renewables.ninja and electricity maps requests with the files
+        recorded in re_ninja/ and electricity_prices/ (written by `cli.py fetch`).
+        locations: (loc, lat, lon, zone) tuples used to map request coordinates and zones to recorded files.
+        latency: seconds added to each response, or a (min, max) range drawn at random.
+        rate_limit: requests allowed per rate_period seconds, beyond that the server answers 429.
+        gap_rate: probability of answering 404, gaps: location names or zones that always answer 404.
+        """
+        if isinstance(latency, (tuple, list)):
+            if len(latency) != 2 or not 0 <= latency[0] <= latency[1]:
+                raise ValueError("latency range must be (min, max) with 0 <= min <= max")
+        elif latency < 0:
+            raise ValueError("latency must not be negative")
+        if rate_limit < 0:
+            raise ValueError("rate_limit must not be negative")
+        if rate_period <= 0:
+            raise ValueError("rate_period must be greater than 0")
+        if not 0 <= gap_rate <= 1:
+            raise ValueError("gap_rate must be between 0 and 1")
+        self.locations = list(locations)
+        self.re_ninja_dir = re_ninja_dir
+        self.elec_prices_dir = elec_prices_dir
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.rate_period = rate_period
+        self.gap_rate = gap_rate
+        self.gaps = set(gaps)
+        self.rng = random.Random(seed)
+        self.stats = {"requests": 0, "200": 0, "404": 0, "429": 0, "400": 0}
+        self._calls = deque()
+        self._prices = {}
+        self._lock = threading.Lock()
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                status, headers, body = stub.handle(self.path)
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    @property
+    def ninja_base(self):
+        return self.url + "api/"
+
+    @property
+    def elec_base(self):
+        return self.url
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def _delay(self):
+        if isinstance(self.latency, (tuple, list)):
+            with self._lock:
+                return self.rng.uniform(*self.latency)
+        return self.latency
+
+    def _rate_limited(self):
+        # Sliding window over all endpoints, returns the Retry-After seconds or 0
+        if not self.rate_limit:
+            return 0
+        with self._lock:
+            now = time.monotonic()
+            while self._calls and now - self._calls[0] >= self.rate_period:
+                self._calls.popleft()
+            if len(self._calls) < self.rate_limit:
+                self._calls.append(now)
+                return 0
+            return max(self.rate_period - (now - self._calls[0]), 0.001)
+
+    def _gap(self, *keys):
+        if self.gaps.intersection(keys):
+            return True
+        with self._lock:
+            return self.gap_rate > 0 and self.rng.random() < self.gap_rate
+
+    def _find(self, lat, lon):
+        for loc, loc_lat, loc_lon, _ in self.locations:
+            if abs(loc_lat - lat) < 1e-6 and abs(loc_lon - lon) < 1e-6:
+                return loc
+        return None
+
+    @staticmethod
+    def find_prices(locations, zone, year, elec_prices_dir="electricity_prices"):
+        """
+        Recorded price file served for a zone: several locations can share a zone,
+        so the first one with a recorded file is used. Returns (loc, path) or (None, None).
+        """
+        for loc, _, _, loc_zone in locations:
+            path = ElectricityMaps.cache_path(loc, year, elec_prices_dir)
+            if loc_zone == zone and os.path.exists(path):
+                return loc, path
+        return None, None
+
+    def _find_prices(self, zone, year):
+        return self.find_prices(self.locations, zone, year, self.elec_prices_dir)
+
+    def handle(self, path):
+        """Return (status, headers, body) for a GET path; also used directly without a socket."""
+        time.sleep(self._delay())
+        url = urlparse(path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        retry_after = self._rate_limited()
+        if retry_after:
+            # Seconds left in the window, not rounded up, so short rate periods are measured as configured
+            status, headers, body = 429, {"Retry-After": f"{retry_after:.3f}"}, b"Too Many Requests"
+        elif url.path.startswith("/api/data/"):
+            status, headers, body = self._ninja(url.path.rsplit("/", 1)[-1], params)
+        elif url.path == "/v3/price-day-ahead/past-range":
+            status, headers, body = self._prices_range(params)
+        else:
+            status, headers, body = 404, {}, b"Not Found"
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats[str(status)] = self.stats.get(str(status), 0) + 1
+        return status, headers, body
+
+    def _ninja(self, re_type, params):
+        if params.get("format", "csv") != "csv":
+            return 400, {}, b"Replay only serves csv"
+        try:
+            loc = self._find(float(params["lat"]), float(params["lon"]))
+        except (KeyError, ValueError):
+            return 400, {}, b"lat and lon are required"
+        path = RenewableNinja.cache_path(loc, re_type, out_dir=self.re_ninja_dir) if loc else None
+        if path is None or not os.path.exists(path) or self._gap(loc):
+            return 404, {}, b"Not Found"
+        with open(path, "rb") as f:
+            return 200, {"Content-Type": "text/csv"}, f.read()
+
+    def _prices_range(self, params):
+        zone = params.get("zone")
+        try:
+            start = pd.Timestamp(params["start"])
+            end = pd.Timestamp(params["end"])
+        except (KeyError, ValueError):
+            return 400, {}, b"start and end are required"
+        loc, path = self._find_prices(zone, start.year)
+        if path is None or self._gap(loc, zone):
+            return 404, {}, b"Not Found"
+        with self._lock:
+            if path not in self._prices:
+                df = pd.read_csv(path)
+                df["_ts"] = pd.to_datetime(df["time"], utc=True)
+                self._prices[path] = df
+            df = self._prices[path]
+        rows = df[(df["_ts"] >= start) & (df["_ts"] < end)]
+        data = [{"datetime": t, "value": v, "unit": u}
+                for t, v, u in zip(rows["time"], rows["value"].astype(float), rows["unit"])]
+        body = json.dumps({"zone": zone, "data": data}).encode()
+        return 200, {"Content-Type": "application/json"}, body
+
+
+def replay_fetch(cfg, locations, server, workers=1, passes=2, api_calls_per_minute=0):
+    """
+    Run the fetch step against a started StubServer, writing into a temporary cache so the
+    first pass downloads everything and later passes measure cache hits.
+    Returns one report dict per pass.
+    """
+    if passes < 1:
+        raise ValueError("passes must be at least 1")
+    reports = []
+    with tempfile.TemporaryDirectory() as tmp:
+        replay_cfg = copy.deepcopy(cfg)
+        replay_cfg.api.update({"ninja_base": server.ninja_base, "elec_base": server.elec_base,
+                               "ninja_sleep_s": 0.0, "elec_sleep_s": 0.0})
+        replay_cfg.outputs.update({"re_ninja_dir": os.path.join(tmp, "re_ninja"),
+                                   "elec_prices_dir": os.path.join(tmp, "electricity_prices")})
+
+        for n in range(passes):
+            rate_limiter = RateLimiter(api_calls_per_minute)
+            before = dict(server.stats)
+            planned = sum(s["cached"] for location in locations
+                          for s in pipeline.plan_location(replay_cfg, location))
+
+            def fetch(location):
+                try:
+                    pipeline.fetch_location(replay_cfg, location, rate_limiter)
+                    return None
+                except Exception as e:
+                    return f"{location[0]}: {e}"
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+                errors = [e for e in pool.map(fetch, locations) if e is not None]
+            elapsed = time.perf_counter() - start
+
+            served = {key: server.stats.get(key, 0) - before.get(key, 0) for key in server.stats}
+            reports.append({
+                "pass": n + 1,
+                "locations": len(locations),
+                "elapsed_s": elapsed,
+                "cache_hits": planned,
+                "api_calls": rate_limiter.calls_made,
+                "retries": rate_limiter.retries,
+                "calls_per_s": rate_limiter.calls_made / elapsed if elapsed > 0 else float("nan"),
+                "served": served,
+                "errors": errors
+            })
+    return reports
+
+
+def print_report(reports):
+    for r in reports:
+        served = ", ".join(f"{key}: {value}" for key, value in r["served"].items() if key != "requests")
+        print(f"Pass {r['pass']}: {r['locations']} location(s) in {r['elapsed_s']:.3f} s, "
+              f"{r['cache_hits']} cache hits, {r['api_calls']} API calls ({r['calls_per_s']:.1f}/s), "
+              f"{r['retries']} retries, served {r['served']['requests']} ({served})")
+        for e in r["errors"]:
+            print(f"  failed {e}")
@@ -47,22 +47,28 @@ def write_sen_analysis(target: str, value: float):
     return df_out
 
 
-legacy_folder = "legacy_files"
-output_folder = "tab_ech"
-os.makedirs(output_folder, exist_ok=True)
+def run_sweep(legacy_folder="legacy_files", output_folder="tab_ech",
+              locations=None, durations=None):
+    locations = location_names if locations is None else locations
+    durations = duration if durations is None else durations
+    os.makedirs(output_folder, exist_ok=True)
 
-for year in duration:
-    for location in location_names:
-        file_name = f'0_{year}_{location}_W_NA_results_PLAN.csv'
-        src_path = os.path.join(legacy_folder, file_name)
-        values = load_plan(src_path, TARGETS)
-        print(f"\n==={file_name}===")
-        for target in TARGETS:
-            v = values.get(target)
-            print(f"{target}: {v:g}")
+    for year in durations:
+        for location in locations:
+            file_name = f'0_{year}_{location}_W_NA_results_PLAN.csv'
+            src_path = os.path.join(legacy_folder, file_name)
+            values = load_plan(src_path, TARGETS)
+            print(f"\n==={file_name}===")
+            for target in TARGETS:
+                v = values.get(target)
+                print(f"{target}: {v:g}")
 
-            df_out = write_sen_analysis(target, v)
-            out_filename = f"{location}_{target}_tabech.csv"
-            out_path = os.path.join(output_folder, out_filename)
-            df_out.to_csv(out_path, sep=";", index=False)
-            print(f"[OK] Wrote {out_filename}")
+                df_out = write_sen_analysis(target, v)
+                out_filename = f"{location}_{target}_tabech.csv"
+                out_path = os.path.join(output_folder, out_filename)
+                df_out.to_csv(out_path, sep=";", index=False)
+                print(f"[OK] Wrote {out_filename}")
+
+
+if __name__ == "__main__":
+    run_sweep()
@@ -1,39 +1,174 @@
-import requests
-import pandas as pd
-from dotenv import load_dotenv
 import os
+import time
+import pandas as pd
+import pytest
+import requests
+from config import PipelineConfig
+from electricitymaps_api import ElectricityMaps
+from limits import RateLimiter, get_with_retry
+from location_selection import LocationSelection
+from ninja import RenewableNinja
+from replay import StubServer, replay_fetch
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RE_NINJA_DIR = os.path.join(ROOT, "re_ninja")
+LOCATIONS = LocationSelection(os.path.join(ROOT, "locations", "location_selection_global_atlas.csv")).locations
+LOC, LAT, LON, _ = LOCATIONS[0]
+
+
+def _record_prices(folder, loc, year=2019):
+    # Hourly prices for a full year in the format written by ElectricityMaps.fetch_electricity_prices
+    times = pd.date_range(f"{year}-01-01", f"{year + 1}-01-01", freq="h", inclusive="left", tz="UTC")
+    os.makedirs(folder, exist_ok=True)
+    path = ElectricityMaps.cache_path(loc, year, folder)
+    pd.DataFrame({"time": times.strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+                  "value": range(len(times)),
+                  "unit": "EUR/MWh"}).to_csv(path, index=False)
+    return path
+
+
+def test_ninja_serves_recorded_file(tmp_path):
+    with StubServer(LOCATIONS, RE_NINJA_DIR) as server:
+        ninja = RenewableNinja(LOC, api_base=server.ninja_base, out_dir=str(tmp_path), sleep_s=0)
+        pv_file = ninja.get_re_data((LAT, LON), re_type="pv")
+    with open(pv_file) as f, open(RenewableNinja.cache_path(LOC, "pv", out_dir=RE_NINJA_DIR)) as g:
+        assert f.read() == g.read()
+    assert server.stats["200"] == 1
+
+
+def test_429_is_retried_after_retry_after():
+    with StubServer(LOCATIONS, RE_NINJA_DIR, rate_limit=1, rate_period=0.3) as server:
+        rate_limiter = RateLimiter()
+        for _ in range(2):
+            r = get_with_retry(requests.Session(), server.ninja_base + "data/pv",
+                               {"lat": LAT, "lon": LON}, rate_limiter, max_retries=10)
+            assert r.status_code == 200
+    assert server.stats["200"] == 2
+    assert server.stats["429"] >= 1
+    assert rate_limiter.retries == server.stats["429"]
+    assert rate_limiter.calls_made == server.stats["requests"]
+
+
+def test_retry_after_is_time_left_in_window():
+    with StubServer(LOCATIONS, RE_NINJA_DIR, rate_limit=1, rate_period=0.3) as server:
+        status, _, _ = server.handle(f"/api/data/pv?lat={LAT}&lon={LON}")
+        assert status == 200
+        status, headers, _ = server.handle(f"/api/data/pv?lat={LAT}&lon={LON}")
+    assert status == 429
+    # Not rounded up to a whole second
+    assert 0 < float(headers["Retry-After"]) <= 0.3
+
+
+def test_429_returned_after_max_retries():
+    with StubServer(LOCATIONS, RE_NINJA_DIR, rate_limit=1, rate_period=60) as server:
+        session = requests.Session()
+        assert get_with_retry(session, server.ninja_base + "data/pv", {"lat": LAT, "lon": LON}).status_code == 200
+        r = get_with_retry(session, server.ninja_base + "data/pv", {"lat": LAT, "lon": LON}, max_retries=0)
+    assert r.status_code == 429
+    assert float(r.headers["Retry-After"]) > 1
+
+
+@pytest.mark.parametrize("kwargs", [{"gaps": [LOC]}, {"gap_rate": 1.0}])
+def test_ninja_gap_is_404(tmp_path, kwargs):
+    with StubServer(LOCATIONS, RE_NINJA_DIR, **kwargs) as server:
+        ninja = RenewableNinja(LOC, api_base=server.ninja_base, out_dir=str(tmp_path), sleep_s=0)
+        with pytest.raises(requests.HTTPError, match="404"):
+            ninja.get_re_data((LAT, LON), re_type="pv")
+    assert server.stats["404"] == 1
+    assert not os.listdir(tmp_path)
+
+
+def test_prices_are_sliced_per_request(tmp_path):
+    recorded = str(tmp_path / "recorded")
+    _record_prices(recorded, "X")
+    with StubServer([("X", 1.0, 2.0, "NL")], RE_NINJA_DIR, recorded) as server:
+        elec = ElectricityMaps("X", api_base=server.elec_base, sleep_s=0, out_dir=str(tmp_path / "out"))
+        path = elec.fetch_electricity_prices("NL")
+    df = pd.read_csv(path)
+    assert len(df) == 8760
+    assert df["value"].tolist() == list(range(8760))
+    assert server.stats["requests"] == 37 == ElectricityMaps.nb_requests(2019)
+    assert server.stats["200"] == 37
+
+
+@pytest.mark.parametrize("kwargs", [{"gaps": ["NL"]}, {"gaps": ["X"]}, {"gap_rate": 1.0}])
+def test_prices_gap_returns_none(tmp_path, kwargs):
+    recorded = str(tmp_path / "recorded")
+    _record_prices(recorded, "X")
+    with StubServer([("X", 1.0, 2.0, "NL")], RE_NINJA_DIR, recorded, **kwargs) as server:
+        elec = ElectricityMaps("X", api_base=server.elec_base, sleep_s=0, out_dir=str(tmp_path / "out"))
+        assert elec.fetch_electricity_prices("NL") is None
+    assert server.stats["404"] == 1
+
+
+def test_prices_shared_zone(tmp_path):
+    recorded = str(tmp_path / "recorded")
+    _record_prices(recorded, "B")
+    with StubServer([("A", 1.0, 2.0, "NL"), ("B", 3.0, 4.0, "NL")], RE_NINJA_DIR, recorded) as server:
+        elec = ElectricityMaps("A", api_base=server.elec_base, sleep_s=0, out_dir=str(tmp_path / "out"))
+        path = elec.fetch_electricity_prices("NL")
+    assert path is not None
+    assert len(pd.read_csv(path)) == 8760
+    assert server.stats["404"] == 0
+
+
+def test_replay_fetch_second_pass_uses_cache(tmp_path):
+    # One location with recorded ninja files and prices, one with ninja files only
+    recorded = str(tmp_path / "recorded")
+    _record_prices(recorded, LOC)
+    locations = [(LOC, LAT, LON, "NL"), LOCATIONS[1]]
+    cfg = PipelineConfig(os.path.join(ROOT, "loadprofiles.toml"))
+    with StubServer(locations, RE_NINJA_DIR, recorded) as server:
+        reports = replay_fetch(cfg, locations, server, workers=2, passes=2)
+
+    first, second = reports
+    assert first["errors"] == [] and second["errors"] == []
+    assert first["cache_hits"] == 0
+    assert first["api_calls"] == 8 + 37
+    assert first["served"]["200"] == 8 + 37
+    assert second["cache_hits"] == 9
+    assert second["api_calls"] == 0
+    assert second["served"]["requests"] == 0
+
+
+@pytest.mark.parametrize("kwargs", [{"rate_limit": -1}, {"latency": -1}, {"latency": (0.2, 0.1)},
+                                    {"rate_period": 0}, {"gap_rate": 1.5}, {"gap_rate": -0.1}])
+def test_stub_rejects_invalid_options(kwargs):
+    with pytest.raises(ValueError):
+        StubServer(LOCATIONS, RE_NINJA_DIR, **kwargs)
+
+
+def test_replay_fetch_needs_a_pass():
+    cfg = PipelineConfig(os.path.join(ROOT, "loadprofiles.toml"))
+    with StubServer(LOCATIONS, RE_NINJA_DIR) as server:
+        with pytest.raises(ValueError):
+            replay_fetch(cfg, LOCATIONS[:1], server, passes=0)
+
+
+def test_find_prices_by_zone(tmp_path):
+    _record_prices(str(tmp_path), "B")
+    locations = [("A", 1.0, 2.0, "NL"), ("B", 3.0, 4.0, "NL"), ("C", 5.0, 6.0, "FR")]
+    assert StubServer.find_prices(locations, "NL", 2019, str(tmp_path)) == \
+        ("B", ElectricityMaps.cache_path("B", 2019, str(tmp_path)))
+    assert StubServer.find_prices(locations, "FR", 2019, str(tmp_path)) == (None, None)
+
+
+def test_replay_dry_run_matches_zone_lookup(tmp_path, capsys):
+    import cli
+    recorded = str(tmp_path / "recorded")
+    _record_prices(recorded, LOCATIONS[1][0])
+    locations_file = tmp_path / "locations.csv"
+    locations_file.write_text("loc,lat,lon,zone\n" + "".join(
+        f"{loc},{lat},{lon},GB\n" for loc, lat, lon, _ in LOCATIONS[:2]))
+    config = tmp_path / "config.toml"
+    config.write_text(f'[outputs]\nre_ninja_dir = "{RE_NINJA_DIR}"\nelec_prices_dir = "{recorded}"\n')
+    args = ["replay", "--config", str(config), "--locations-file", str(locations_file)]
+
+    cli.main(args + ["--dry-run"])
+    prices = [line for line in capsys.readouterr().out.splitlines() if "fetch prices" in line]
+    assert len(prices) == 2
+    assert all("recorded" in line for line in prices)
 
-load_dotenv()
-token = os.getenv('API_TOKEN')
-api_base = 'https://www.renewables.ninja/api/'
-
-s = requests.session()
-# Send token header with each request
-s.headers = {'Authorization': 'Token ' + token}
-
-# PV example
-
-url = api_base + 'data/pv'
-
-args = {
-    'lat': 34.125,
-    'lon': 39.814,
-    'date_from': '2015-01-01',
-    'date_to': '2015-12-31',
-    'dataset': 'merra2',
-    'capacity': 1.0,
-    'system_loss': 0.1,
-    'tracking': 0,
-    'tilt': 35,
-    'azim': 180,
-    'format': 'json'
-}
-
-r = s.get(url, params=args)
-r.raise_for_status()
-
-# Parse JSON to get a pandas.DataFrame of data and dict of metadata
-parsed_response = r.json()
-data = pd.DataFrame.from_dict(parsed_response['data'], orient='index')
-metadata = parsed_response['metadata']
-print(data)
\ No newline at end of file
+    cli.main(args + ["--dry-run", "--gap", "GB"])
+    prices = [line for line in capsys.readouterr().out.splitlines() if "fetch prices" in line]
+    assert all("gap (404)" in line for line in prices)
@@ -0,0 +1,61 @@
+import argparse
+import pytest
+import cli
+
+
+def test_bbox():
+    assert cli._bbox("40,-10,60,10.5") == (40.0, -10.0, 60.0, 10.5)
+
+
+@pytest.mark.parametrize("value", ["40,-10,60", "a,b,c,d", "60,-10,40,10", "40,10,60,-10"])
+def test_bbox_invalid(value):
+    with pytest.raises(argparse.ArgumentTypeError):
+        cli._bbox(value)
+
+
+def test_names():
+    assert cli._names(None) is None
+    assert cli._names([]) is None
+    assert cli._names(["HW,HS", "LWS", "MWS,"]) == ["HW", "HS", "LWS", "MWS"]
+
+
+def test_latency():
+    assert cli._latency("0.5") == 0.5
+    assert cli._latency("0.1,0.2") == (0.1, 0.2)
+    with pytest.raises(argparse.ArgumentTypeError):
+        cli._latency("0.2,0.1")
+
+
+@pytest.mark.parametrize("flag", ["--rate-limit=-1", "--latency=-1", "--latency=-0.1,0.2", "--passes=0",
+                                  "--gap-rate=1.5", "--gap-rate=-0.1", "--rate-period=0", "--rate-period=-1"])
+def test_invalid_replay_options(flag, capsys):
+    with pytest.raises(SystemExit) as e:
+        cli.main(["replay", "--location", "HW", flag])
+    assert isinstance(e.value.code, str)
+    assert "Stub servers listening" not in capsys.readouterr().out
+
+
+def test_invalid_replay_config(tmp_path):
+    path = tmp_path / "config.toml"
+    path.write_text("[replay]\nlatency = [0.2, 0.1]\n")
+    with pytest.raises(SystemExit, match="latency"):
+        cli.main(["replay", "--location", "HW", "--config", str(path)])
+
+
+def test_sweep_rejects_limit_flags():
+    with pytest.raises(SystemExit):
+        cli.build_parser().parse_args(["sweep", "--workers", "2"])
+
+
+@pytest.mark.parametrize("flag", ["--workers=0", "--max-memory-mb=-1", "--api-calls-per-minute=-1"])
+def test_invalid_limits(flag):
+    args = cli.build_parser().parse_args(["fetch", flag])
+    with pytest.raises(SystemExit):
+        cli._limits(cli.PipelineConfig(), args)
+
+
+def test_limits_override_config():
+    args = cli.build_parser().parse_args(["build", "--workers", "3"])
+    limits = cli._limits(cli.PipelineConfig(), args)
+    assert limits["workers"] == 3
+    assert limits["api_calls_per_minute"] == 0
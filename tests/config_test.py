@@ -0,0 +1,59 @@
+import pytest
+from config import DEFAULTS, PipelineConfig
+
+
+def _write(tmp_path, text):
+    path = tmp_path / "config.toml"
+    path.write_text(text)
+    return str(path)
+
+
+def test_sections_merge_key_by_key(tmp_path):
+    cfg = PipelineConfig(_write(tmp_path, '[limits]\nworkers = 4\n[time]\nnb_steps = 48\n'))
+    assert cfg.limits["workers"] == 4
+    assert cfg.limits["api_calls_per_minute"] == DEFAULTS["limits"]["api_calls_per_minute"]
+    assert cfg.time["nb_steps"] == 48
+    assert cfg.time["start_date"] == DEFAULTS["time"]["start_date"]
+    assert cfg.merge_map == DEFAULTS["merge"]
+
+
+def test_merge_replaces_default_map(tmp_path):
+    cfg = PipelineConfig(_write(tmp_path, '[merge.Heat]\ncolumns_idx = [1, 2]\nunits = "MW"\n'))
+    assert cfg.merge_map == {"Heat": {"columns_idx": [1, 2], "units": "MW"}}
+
+
+def test_defaults_are_not_shared(tmp_path):
+    cfg = PipelineConfig(_write(tmp_path, '[limits]\nworkers = 8\n'))
+    assert cfg.limits["workers"] == 8
+    assert DEFAULTS["limits"]["workers"] == 1
+
+
+def test_unknown_section(tmp_path):
+    with pytest.raises(ValueError, match="limit"):
+        PipelineConfig(_write(tmp_path, '[limit]\nworkers = 4\n'))
+
+
+def test_unknown_key(tmp_path):
+    with pytest.raises(ValueError, match="worker"):
+        PipelineConfig(_write(tmp_path, '[limits]\nworker = 4\n'))
+
+
+@pytest.mark.parametrize("text", ['[limits]\nworkers = "4"\n', '[limits]\nworkers = 4.0\n',
+                                  '[limits]\nworkers = true\n', '[inputs]\nrand_range = 0.9\n',
+                                  '[outputs]\ndataseries_dir = 1\n', 'limits = 4\n'])
+def test_wrong_type(tmp_path, text):
+    with pytest.raises(ValueError):
+        PipelineConfig(_write(tmp_path, text))
+
+
+
+def test_int_accepted_for_float(tmp_path):
+    cfg = PipelineConfig(_write(tmp_path, '[replay]\nrate_period = 2\n'))
+    assert cfg.replay["rate_period"] == 2
+
+
+def test_latency_range(tmp_path):
+    cfg = PipelineConfig(_write(tmp_path, '[replay]\nlatency = [0.1, 0.2]\n'))
+    assert cfg.replay["latency"] == [0.1, 0.2]
+    with pytest.raises(ValueError):
+        PipelineConfig(_write(tmp_path, '[replay]\nlatency = "0.1"\n'))
@@ -1,72 +1,52 @@
-import pandas as pd
 import os
-from persee_format import PerseeFormat
-from ninja import RenewableNinja
+import pandas as pd
+import pytest
+import requests
+from config import PipelineConfig
 from location_selection import LocationSelection
-from temperatures import Temperatures
+from persee_format import PerseeFormat
+from replay import StubServer
+import pipeline
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EDE = ("Ede", 52.0440, 5.6640, None)
 
-START_DATE = '2025-01-01 00:00'
-SEC_INTERVAL = 3600  # Measured in seconds
-STEPS_PER_DAY = 24  # Number of time steps in a day (typically measured in hours)
-NB_STEPS = 8760  # Based on time steps but typically measured in hours
 
-persee = PerseeFormat()
-base_df = pd.DataFrame({"Time": [int((i + 1) * SEC_INTERVAL) for i in range(NB_STEPS)]})
-base_load_dict = {}
-# Download generic load profiles
-profile_df = pd.read_excel('profili.xlsx')
-# Add load profiles from excel file
-base_df, base_load_dict = persee.generate_loads("Loads.csv", base_df, base_load_dict, NB_STEPS, STEPS_PER_DAY,
-                                                profile_df, rand_range=(0.9, 1.1))
-merge_map = {
-    "Elec_Central": {
-        "columns_idx": list(range(1, 10)),
-        "load_type": "load",
-        "units": "MW"
-    }
-}
-# Run merge loads function  (optional)
-base_df, base_load_dict = persee.merge_loads(base_df, base_load_dict, merge_map, drop_originals=False)
+def _config(server, tmp_path):
+    # Inputs from the repository, API calls to the stub and every output in tmp_path
+    cfg = PipelineConfig(os.path.join(ROOT, "loadprofiles.toml"))
+    cfg.inputs["profiles"] = os.path.join(ROOT, cfg.inputs["profiles"])
+    cfg.inputs["loads"] = os.path.join(ROOT, cfg.inputs["loads"])
+    cfg.api.update({"ninja_base": server.ninja_base, "elec_base": server.elec_base,
+                    "ninja_sleep_s": 0.0, "elec_sleep_s": 0.0})
+    cfg.outputs.update({"re_ninja_dir": str(tmp_path / "re_ninja"),
+                        "elec_prices_dir": str(tmp_path / "electricity_prices"),
+                        "dataseries_dir": str(tmp_path / "dataseries")})
+    return cfg
 
-# Add location specific data
-ninja = RenewableNinja(location_name="Ede")
-pv_file = ninja.get_re_data((52.0440, 5.6640), re_type="pv")
-wind_file = ninja.get_re_data((52.0440, 5.6640), re_type="wind")
-demand_file = ninja.get_re_data((52.0440, 5.6640), re_type="demand")
-temp_file = ninja.get_re_data((52.0440, 5.6640), re_type="weather")
-temps = Temperatures(temp_file, loc="Ede", coords=(52.0440, 5.6640))
-cop_file = temps.cop_series_to_csv()
 
-# Add data from renewables ninja
-df, load_dict = persee.load_renewables(pv_file, ["PV"], [1],
-                                       base_df, base_load_dict, 1000000, load_type="Generation")
-# Solar Thermal estimated at 707 W/m2 at 20C vs. 250 W/m2 for PV which is 2.8 times more
-df, load_dict = persee.load_renewables(pv_file, ["Solar_Thermal"], [1],
-                                       df, load_dict, 353606, load_type="Generation")
-df, load_dict = persee.load_renewables(wind_file, ["Wind"], [1],
-                                       df, load_dict, 1000, load_type="Generation")
-df, load_dict = persee.load_renewables(demand_file, ["Heating_Central", "Cooling_Central"], [2, 3],
-                                       df, load_dict, 1000)
-df, load_dict = persee.load_renewables(temp_file, ["Temperature"], [1], df, load_dict,
-                                       divider=1, load_type="temp", units="degC")
-df, load_dict = persee.load_renewables(cop_file, ["COP"], [0], dataframe=df, load_dictionary=load_dict,
-                                       divider=1, skiprows=0, load_type="COP", units="-")
-print("Ede")
-print(f"Average Temperature: {temps.t_avg}")
-print(f"Summer Average Temperature: {temps.summer_avg}")
-print(f"Winter Average Temperature: {temps.winter_avg}")
-print(f"COP Average Temperature: {temps.cop_avg}")
-print(f"Electricity Average (MW): {df["Elec_Central"].mean()}")
-print(f"Heating Average (MW): {df.loc[df['Heating_Central'] > 0, "Heating_Central"].mean()}")
-print(f"Cooling Average (MW): {df.loc[df['Cooling_Central'] > 0, "Cooling_Central"].mean()}")
+def test_build_location_offline(tmp_path):
+    # re_ninja/ has no weather file for Ede, so the full build uses the first recorded location
+    location = LocationSelection(os.path.join(ROOT, "locations", "location_selection_global_atlas.csv")).locations[0]
+    with StubServer([location, EDE], os.path.join(ROOT, "re_ninja")) as server:
+        cfg = _config(server, tmp_path)
+        persee = PerseeFormat()
+        base_df, base_load_dict = pipeline.build_base_loads(cfg, persee)
+        result = pipeline.build_location(cfg, persee, base_df, base_load_dict, location)
 
+    assert server.stats["200"] == 4
+    assert result["loc"] == location[0]
+    out_path = os.path.join(cfg.outputs["dataseries_dir"], f"INDY_{location[0]}_dataseries.csv")
+    df = pd.read_csv(out_path, sep=";", header=None, low_memory=False)
+    assert len(df) == 4 + cfg.time["nb_steps"]
+    for name in ["Time", "Elec_Central", "PV", "Wind", "Heating_Central", "Temperature", "COP"]:
+        assert name in df.iloc[0].tolist()
 
-# Add PERSEE required descriptive headers
-df = persee.add_headers(df, load_dict, START_DATE)
 
-# Save final DataFrame to CSV
-out_dir = "dataseries"
-os.makedirs(out_dir, exist_ok=True)
-out_path = os.path.join(out_dir, f"INDY_{ninja.location_name}_dataseries.csv")
-df.to_csv(out_path, sep=";", index=False, header=False, float_format='%3g')
-print(f"Saved dataseries to {out_path}")
+def test_ede_missing_weather_is_404(tmp_path):
+    with StubServer([EDE], os.path.join(ROOT, "re_ninja")) as server:
+        cfg = _config(server, tmp_path)
+        with pytest.raises(requests.HTTPError, match="404"):
+            pipeline.fetch_location(cfg, EDE)
+    assert server.stats["200"] == 3
+    assert server.stats["404"] == 1
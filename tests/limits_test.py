@@ -0,0 +1,35 @@
+import time
+import pytest
+from limits import RateLimiter, set_memory_limit
+
+
+def test_unlimited_counts_calls():
+    rate_limiter = RateLimiter(0)
+    for _ in range(5):
+        rate_limiter.acquire()
+    assert rate_limiter.calls_made == 5
+
+
+def test_window_blocks_until_oldest_call_expires():
+    rate_limiter = RateLimiter(2, period=0.2)
+    start = time.monotonic()
+    for _ in range(2):
+        rate_limiter.acquire()
+    assert time.monotonic() - start < 0.1
+    rate_limiter.acquire()
+    assert time.monotonic() - start >= 0.2
+    assert rate_limiter.calls_made == 3
+
+
+def test_record_retry():
+    rate_limiter = RateLimiter()
+    rate_limiter.record_retry()
+    assert rate_limiter.retries == 1
+
+
+def test_negative_limits():
+    with pytest.raises(ValueError):
+        RateLimiter(-1)
+    with pytest.raises(ValueError):
+        set_memory_limit(-1)
+    assert set_memory_limit(0) is False
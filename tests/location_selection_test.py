@@ -0,0 +1,46 @@
+import pytest
+from location_selection import LocationSelection
+
+
+def _write(tmp_path, text):
+    path = tmp_path / "locations.csv"
+    path.write_text(text)
+    return str(path)
+
+
+def test_missing_zone_column_is_none(tmp_path):
+    loc_sel = LocationSelection(_write(tmp_path, "loc,lat,lon\nA,10.0,20.0\n"))
+    assert loc_sel.locations == [("A", 10.0, 20.0, None)]
+
+
+def test_zone_column_is_kept(tmp_path):
+    loc_sel = LocationSelection(_write(tmp_path, "loc,lat,lon,zone\nA,10.0,20.0,NL\n"))
+    assert loc_sel.locations == [("A", 10.0, 20.0, "NL")]
+
+
+def test_select_by_name_keeps_file_order(tmp_path):
+    loc_sel = LocationSelection(_write(tmp_path, "loc,lat,lon\nA,1,1\nB,2,2\nC,3,3\n"))
+    assert [loc for loc, _, _, _ in loc_sel.select(names=["C", "A"])] == ["A", "C"]
+
+
+def test_select_unknown_name_raises(tmp_path):
+    loc_sel = LocationSelection(_write(tmp_path, "loc,lat,lon\nA,1,1\n"))
+    with pytest.raises(ValueError, match="X"):
+        loc_sel.select(names=["A", "X"])
+
+
+def test_select_bbox_includes_edges(tmp_path):
+    loc_sel = LocationSelection(_write(tmp_path, "loc,lat,lon\nA,40,-10\nB,60,10\nC,60.1,0\nD,50,-10.5\n"))
+    selected = loc_sel.select(bbox=(40, -10, 60, 10))
+    assert [loc for loc, _, _, _ in selected] == ["A", "B"]
+
+
+def test_select_name_and_bbox(tmp_path):
+    loc_sel = LocationSelection(_write(tmp_path, "loc,lat,lon\nA,45,0\nB,50,0\n"))
+    assert loc_sel.select(names=["A", "B"], bbox=(49, -1, 51, 1)) == [("B", 50, 0, None)]
+
+
+def test_select_without_locations_file(tmp_path):
+    loc_sel = LocationSelection(str(tmp_path / "missing.csv"))
+    assert loc_sel.locations is None
+    assert loc_sel.select() == []
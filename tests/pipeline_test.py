@@ -0,0 +1,31 @@
+import pandas as pd
+import pipeline
+
+
+def _row(loc, value):
+    return {"loc": loc, "lat": 1.0, "lon": 2.0, "avg_temp": value}
+
+
+def test_update_averages_new_file(tmp_path):
+    path = str(tmp_path / "averages.csv")
+    pipeline.update_averages(path, [_row("A", 1.0), _row("B", 2.0)])
+    assert pd.read_csv(path)["loc"].tolist() == ["A", "B"]
+
+
+def test_update_averages_keeps_other_locations(tmp_path):
+    path = str(tmp_path / "averages.csv")
+    pipeline.update_averages(path, [_row("A", 1.0), _row("B", 2.0), _row("C", 3.0)])
+    pipeline.update_averages(path, [_row("B", 20.0), _row("D", 4.0)])
+    df = pd.read_csv(path)
+    assert df["loc"].tolist() == ["A", "B", "C", "D"]
+    assert df["avg_temp"].tolist() == [1.0, 20.0, 3.0, 4.0]
+
+
+def test_update_averages_adds_new_columns(tmp_path):
+    path = str(tmp_path / "averages.csv")
+    pipeline.update_averages(path, [_row("A", 1.0)])
+    pipeline.update_averages(path, [dict(_row("B", 2.0), elec_price_avg=50.0)])
+    df = pd.read_csv(path)
+    assert df.columns.tolist() == ["loc", "lat", "lon", "avg_temp", "elec_price_avg"]
+    assert pd.isna(df.loc[0, "elec_price_avg"])
+    assert df.loc[1, "elec_price_avg"] == 50.0